@@ -0,0 +1,32 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.8.4;
+
+import "./stIOTX.sol";
+import "./iotex_staking.sol";
+
+/**
+ * @dev one-shot initializer, wires freshly deployed stIOTX & IOTEXStaking proxies
+ * together in its constructor, then hands ownership and all roles over to `owner`
+ */
+contract IotexInitializer {
+    constructor(address token, address payable staking, address redeem, address owner) {
+        stIOTX st = stIOTX(token);
+        st.initialize();
+        st.setMintable(staking, true);
+        st.setMintable(owner, true);
+        st.setMintable(address(this), false);
+        st.transferOwnership(owner);
+
+        IOTEXStaking s = IOTEXStaking(staking);
+        s.initialize();
+        s.setStIOTXContractAddress(token);
+        s.setRedeemContract(redeem);
+
+        // admin role goes last, it is required to grant the others
+        bytes32[5] memory roles = [s.MANAGER_ROLE(), s.ORACLE_ROLE(), s.OPERATOR_ROLE(), s.PAUSER_ROLE(), s.DEFAULT_ADMIN_ROLE()];
+        for (uint256 i = 0; i < roles.length; ++i) {
+            s.grantRole(roles[i], owner);
+            s.renounceRole(roles[i], address(this));
+        }
+    }
+}
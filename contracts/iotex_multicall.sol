@@ -0,0 +1,31 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.8.4;
+
+/**
+ * @dev aggregates read-only calls, so that scripts can fetch several values with one eth_call
+ */
+contract IotexMulticall {
+    struct Call {
+        address target;
+        bytes callData;
+    }
+
+    struct Result {
+        bool success;
+        bytes returnData;
+    }
+
+    /**
+     * @dev static call each target, failed calls are reported instead of reverting unless `requireSuccess`
+     */
+    function tryAggregate(bool requireSuccess, Call[] calldata calls) external view returns (Result[] memory results) {
+        results = new Result[](calls.length);
+        for (uint256 i = 0; i < calls.length; ++i) {
+            (bool success, bytes memory ret) = calls[i].target.staticcall(calls[i].callData);
+            if (requireSuccess) {
+                require(success, "MULTICALL_FAILED");
+            }
+            results[i] = Result(success, ret);
+        }
+    }
+}
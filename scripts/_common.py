@@ -0,0 +1,332 @@
+from brownie import IotexInitializer, IotexMulticall, IotexRedeem, IOTEXStaking, stIOTX
+from brownie import chain, config, project, web3
+from brownie.network.account import LocalAccount
+from eth_utils import keccak, to_checksum_address
+from functools import lru_cache
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import re
+import rlp
+from requests.adapters import HTTPAdapter
+import requests
+import time
+import websockets
+
+try:
+    from eth_abi import decode as abi_decode, encode as abi_encode
+except ImportError:  # eth-abi < 4
+    from eth_abi import decode_abi as abi_decode, encode_abi as abi_encode
+
+GAS_LIMIT = 6721975
+PRIORITY_FEE = 2 * 10**9
+CACHE_DIR = Path.home() / ".cache" / "iotex-staking"
+
+# one keep-alive connection pool for every batch request to the node
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+
+def selector(signature):
+    return "0x" + bytes(web3.keccak(text=signature)[:4]).hex()
+
+
+EXCHANGE_RATIO = selector("exchangeRatio()")
+DEBT_OF = selector("debtOf(address)")
+BALANCE_OF = selector("balanceOf(address)")
+ALLOWANCE = selector("allowance(address,address)")
+TRY_AGGREGATE = selector("tryAggregate(bool,(address,bytes)[])")
+
+
+def _hex(value):
+    if isinstance(value, str):
+        return value if value.startswith("0x") else "0x" + value
+    if isinstance(value, int):
+        return hex(value)
+    return "0x" + bytes(value).hex()
+
+
+def _dependency_path():
+    return Path.home() / ".brownie" / "packages" / config["dependencies"][0]
+
+
+@lru_cache(maxsize=1)
+def _deps():
+    return project.load(_dependency_path())
+
+
+def _import_closure(source):
+    """
+    `source` and every file it imports, directly or transitively.
+    """
+    seen = []
+    todo = [source.resolve()]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.append(path)
+        todo += [(path.parent / imp).resolve() for imp in re.findall(r'^import\s+"([^"]+)";', path.read_text(), re.M)]
+    return sorted(seen)
+
+
+@lru_cache(maxsize=1)
+def proxy_artifact():
+    """
+    ABI and bytecode of TransparentUpgradeableProxy, cached on disk so that
+    later runs don't have to load the dependency project. The cache is keyed
+    by the dependency id, the compiler settings and the hash of every source
+    the proxy is built from, so any change to those invalidates it.
+    """
+    source = _dependency_path() / "contracts" / "proxy" / "transparent" / "TransparentUpgradeableProxy.sol"
+    digest = hashlib.sha256(json.dumps(config["compiler"]["solc"], sort_keys=True, default=str).encode())
+    for path in _import_closure(source):
+        digest.update(path.read_bytes())
+
+    name = config["dependencies"][0].replace("/", "_")
+    path = CACHE_DIR / f"{name}-tuproxy-{digest.hexdigest()}.json"
+    if path.exists():
+        return json.loads(path.read_text())
+
+    proxy = _deps().TransparentUpgradeableProxy
+    artifact = {"abi": proxy.abi, "bytecode": proxy.bytecode}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(artifact))
+    return artifact
+
+
+def contract_address(sender, nonce):
+    """
+    Address of the contract created by `sender`'s transaction with `nonce`.
+    """
+    return to_checksum_address(keccak(rlp.encode([bytes.fromhex(sender[2:]), nonce]))[12:])
+
+
+def proxy_deploy_data(implementation, admin):
+    args = abi_encode(["address", "address", "bytes"], [str(implementation), str(admin), b""])
+    return _hex(proxy_artifact()["bytecode"]) + args.hex()
+
+
+def rpc_batch(calls, optional=()):
+    """
+    Send a list of (method, params) as a single JSON-RPC batch request and
+    return the results in the same order. Errors raise, except for calls whose
+    index is in `optional`, which come back as None.
+    """
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    response = _session.post(web3.provider.endpoint_uri, json=payload)
+    response.raise_for_status()
+
+    results = sorted(response.json(), key=lambda r: r["id"])
+    for r in results:
+        if "error" in r and r["id"] not in optional:
+            raise RuntimeError(f"{calls[r['id']][0]} failed: {r['error']}")
+    return [r.get("result") for r in results]
+
+
+def read_batch(calls, multicall=None):
+    """
+    Read every (contract, selector, *address_args) with one request, results
+    are decoded as uint256. Reads that revert or don't return exactly one word
+    (e.g. a target without code) come back as None. With a deployed
+    IotexMulticall the reads execute in a single eth_call through tryAggregate,
+    otherwise they go out as one JSON-RPC batch.
+    """
+    data = [sel + abi_encode(["address"] * len(args), list(args)).hex() for _, sel, *args in calls]
+
+    if multicall is not None:
+        encoded = abi_encode(["bool", "(address,bytes)[]"], [False, [(c[0], bytes.fromhex(d[2:])) for c, d in zip(calls, data)]])
+        result = rpc_batch([("eth_call", [{"to": multicall, "data": TRY_AGGREGATE + encoded.hex()}, "latest"])])[0]
+        (returned,) = abi_decode(["(bool,bytes)[]"], bytes.fromhex(result[2:]))
+    else:
+        results = rpc_batch([
+            ("eth_call", [{"to": c[0], "data": d}, "latest"])
+            for c, d in zip(calls, data)
+        ], optional=range(len(calls)))
+        returned = [(r is not None, bytes.fromhex((r or "0x")[2:])) for r in results]
+
+    return [int.from_bytes(r, "big") if success and len(r) == 32 else None for success, r in returned]
+
+
+def _send_call(account, tx):
+    # local accounts sign client-side, unlocked node accounts (ganache) sign on the node
+    if isinstance(account, LocalAccount):
+        signed = web3.eth.account.sign_transaction(dict(tx, chainId=chain.id), account.private_key)
+        return "eth_sendRawTransaction", [_hex(signed.rawTransaction)]
+
+    tx = dict(tx, **{"from": account.address})
+    return "eth_sendTransaction", [{k: _hex(v) for k, v in tx.items()}]
+
+
+def tx_params(account, estimate=()):
+    """
+    Pending nonce of `account`, fee fields and gas limits (with 20% headroom)
+    for the transactions in `estimate`, all in one request. Fees are EIP-1559
+    (type 2) derived from the pending block's base fee. Chains without a base
+    fee, or nodes that can't serve the pending block, get a legacy gas price.
+    """
+    nonce, gas_price, block, *gas = rpc_batch([
+        ("eth_getTransactionCount", [account.address, "pending"]),
+        ("eth_gasPrice", []),
+        ("eth_getBlockByNumber", ["pending", False]),
+    ] + [("eth_estimateGas", [dict(tx, **{"from": account.address})]) for tx in estimate], optional={2})
+
+    if block and block.get("baseFeePerGas") is not None:
+        fees = {
+            "type": 2,
+            "maxPriorityFeePerGas": PRIORITY_FEE,
+            "maxFeePerGas": int(block["baseFeePerGas"], 16) * 2 + PRIORITY_FEE,
+        }
+    else:
+        fees = {"gasPrice": int(gas_price, 16)}
+    return int(nonce, 16), fees, [int(int(g, 16) * 1.2) for g in gas]
+
+
+def send_batch(account, txs, params=None):
+    """
+    Broadcast `txs` from `account` in one batch request, assigning
+    consecutive nonces locally starting from `params` (see tx_params).
+    Returns the transaction hashes.
+    """
+    nonce, fees, _ = params or tx_params(account)
+
+    calls = [
+        _send_call(account, dict({"value": 0}, **fees, **tx, nonce=nonce + i))
+        for i, tx in enumerate(txs)
+    ]
+    return rpc_batch(calls)
+
+
+async def _on_new_heads(ws_uri, fetch, idle_timeout):
+    """
+    Call `fetch` on every newHeads notification until it returns True. Returns
+    False if the node stays silent for `idle_timeout` seconds, so the caller
+    can fall back to polling.
+    """
+    async with websockets.connect(ws_uri) as ws:
+        await ws.send(json.dumps({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]}))
+        try:
+            reply = json.loads(await asyncio.wait_for(ws.recv(), idle_timeout))
+            if "error" in reply or not reply.get("result"):
+                raise RuntimeError(f"eth_subscribe newHeads failed: {reply.get('error', reply)}")
+
+            # subscribed before the first fetch, so a block mined in between still wakes us up
+            while not fetch():
+                await asyncio.wait_for(ws.recv(), idle_timeout)
+        except asyncio.TimeoutError:
+            return False
+    return True
+
+
+def wait_for_receipts(tx_hashes, poll_interval=0.1, max_interval=2, timeout=600, ws_uri=None, ws_timeout=30):
+    """
+    Wait for the receipts of all `tx_hashes`, raise if any of them reverted
+    or if they are not all mined within `timeout` seconds.
+    Receipts are fetched in one batch request each time a new block shows up.
+    With `ws_uri` new blocks come from a newHeads subscription, falling back to
+    polling if no block arrives for `ws_timeout` seconds. Polling checks the
+    block number, backing off exponentially up to `max_interval`.
+    """
+    receipts = {}
+    deadline = time.monotonic() + timeout
+
+    def check_deadline():
+        if time.monotonic() > deadline:
+            pending = [h for h in tx_hashes if h not in receipts]
+            raise TimeoutError(f"transactions not mined after {timeout}s: {pending}")
+
+    def fetch():
+        pending = [h for h in tx_hashes if h not in receipts]
+        results = rpc_batch([("eth_getTransactionReceipt", [h]) for h in pending])
+        receipts.update((h, r) for h, r in zip(pending, results) if r is not None)
+        if len(receipts) == len(tx_hashes):
+            return True
+        check_deadline()
+        return False
+
+    if not (ws_uri and asyncio.run(_on_new_heads(ws_uri, fetch, ws_timeout))):
+        block = None
+        attempt = 0
+        while True:
+            latest = int(rpc_batch([("eth_blockNumber", [])])[0], 16)
+            if latest != block:
+                block, attempt = latest, 0
+                if fetch():
+                    break
+            check_deadline()
+            interval = min(poll_interval * 1.5 ** attempt, max_interval)
+            time.sleep(interval)
+            if interval < max_interval:
+                attempt += 1
+
+    reverted = [h for h in tx_hashes if int(receipts[h]["status"], 16) != 1]
+    if reverted:
+        raise RuntimeError(f"transactions reverted: {reverted}")
+    return [receipts[h] for h in tx_hashes]
+
+
+def _layers(steps):
+    """
+    Group (name, deps, build) steps into dependency layers, Kahn's algorithm.
+    """
+    remaining = {name: set(deps) for name, deps, _ in steps}
+    layers = []
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"dependency cycle between {sorted(remaining)}")
+        layers.append(ready)
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return layers
+
+
+def deploy_stack(owner, deployer, multicall=False, ws_uri=None):
+    """
+    Deploy stIOTX, IOTEXStaking and IotexRedeem behind proxies administered by
+    `deployer` and wire them up for `owner`, as one pipelined batch. Returns
+    the proxy addresses, plus the address of an IotexMulticall if requested
+    (None otherwise). `ws_uri` is passed on to wait_for_receipts.
+    """
+    impls = [("stIOTX", stIOTX), ("IOTEXStaking", IOTEXStaking), ("IotexRedeem", IotexRedeem)]
+    proxies = [f"{name}_proxy" for name, _ in impls]
+
+    # each step builds its calldata from the addresses of its dependencies
+    steps = [(name, (), lambda a, c=c: c.deploy.encode_input()) for name, c in impls]
+    steps += [(f"{name}_proxy", (name,), lambda a, name=name: proxy_deploy_data(a[name], deployer.address)) for name, _ in impls]
+    # wire the proxies up in a single transaction, ownership and roles end up with owner
+    steps += [("IotexInitializer", proxies, lambda a: IotexInitializer.deploy.encode_input(*[a[p] for p in proxies], owner))]
+    if multicall:
+        steps += [("IotexMulticall", (), lambda a: IotexMulticall.deploy.encode_input())]
+
+    builds = {name: build for name, _, build in steps}
+    layers = _layers(steps)
+
+    # the first layer can be estimated against current state, later layers depend on
+    # contracts that are not mined yet, so they keep GAS_LIMIT
+    txs = [{"data": _hex(builds[name]({}))} for name in layers[0]]
+    params = tx_params(deployer, estimate=txs)
+    for tx, gas in zip(txs, params[2]):
+        tx["gas"] = gas
+
+    # every layer comes after its dependencies in deployer's nonce order, so the whole
+    # graph is signed up front and goes out in one batch
+    order = [name for layer in layers for name in layer]
+    addresses = {name: contract_address(deployer.address, params[0] + i) for i, name in enumerate(order)}
+    # addresses are deterministic, report them before anything is broadcast
+    for name in order:
+        print(f"{name}: {addresses[name]}")
+
+    txs += [{"data": _hex(builds[name](addresses)), "gas": GAS_LIMIT} for name in order[len(layers[0]):]]
+
+    # a successful dependent doesn't prove its dependencies succeeded (the redeem
+    # address is only stored, never called), so every receipt is checked
+    wait_for_receipts(send_batch(deployer, txs, params), ws_uri=ws_uri)
+    return (*[addresses[p] for p in proxies], addresses.get("IotexMulticall"))